@@ -13,57 +13,365 @@ Usage:
 """
 
 import argparse
+import asyncio
+import codecs
+import csv
+import locale
+import logging
+import logging.handlers
 import os
 import re
+import socket
 import subprocess
 import sys
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 
-def replace_host_in_request(request_content, new_host):
+logger = logging.getLogger('sqlmap_bulk_host')
+
+# Binary stream sqlmap's output is echoed to unchanged (set by setup_logging).
+# When None, the output goes through the logger instead.
+raw_output = None
+
+# Encoding of sqlmap's piped output: Python children write pipes in the locale
+# encoding (the ANSI code page on Windows, e.g. cp936), the same encoding
+# subprocess's text mode decodes with
+SQLMAP_ENCODING = locale.getpreferredencoding(False)
+
+# Whether stdout is a terminal: only then is sqlmap's output flushed as soon as
+# it arrives. Piped or redirected, it is left to stdout's block buffering
+INTERACTIVE = sys.stdout is not None and sys.stdout.isatty()
+
+# Number of log records buffered before they are written to the --quiet log file
+LOG_BUFFER_RECORDS = 256
+
+# File successful targets are written to
+RESULT_FILE = 'result.txt'
+
+# Host header line in an HTTP request (case-insensitive, supports spaces)
+HOST_HEADER_RE = re.compile(r'(?im)^(Host:\s*).*$')
+
+# Blank line between the headers and the body of an HTTP request
+HEADERS_END_RE = re.compile(r'\r?\n\r?\n')
+
+# Patterns below are matched against the lowercased sqlmap output
+
+# SQL injection detection indicators (more specific patterns)
+INJECTION_PATTERNS = (
+    r'parameter.*is.*injectable',  # "parameter 'id' is injectable"
+    r'is vulnerable',  # "is vulnerable"
+    r'payload:.*sql',  # "payload: SQL injection"
+    r'back-end dbms:.*\(injectable\)',  # "back-end DBMS: MySQL (injectable)"
+)
+
+# Database fingerprint indicators, checked in this order
+# Look for "back-end DBMS:" or "database management system:" followed by DB type
+DB_TYPE_PATTERNS = {
+    'mysql': (
+        r'back-end dbms:\s*mysql',
+        r'database management system:\s*mysql',
+        r'the back-end dbms is mysql',
+    ),
+    'postgresql': (
+        r'back-end dbms:\s*postgresql',
+        r'database management system:\s*postgresql',
+        r'the back-end dbms is postgresql',
+    ),
+    'mssql': (
+        r'back-end dbms:\s*microsoft sql server',
+        r'back-end dbms:\s*mssql',
+        r'database management system:\s*microsoft sql server',
+        r'the back-end dbms is microsoft sql server',
+    ),
+    'oracle': (
+        r'back-end dbms:\s*oracle',
+        r'database management system:\s*oracle',
+        r'the back-end dbms is oracle',
+    ),
+    'sqlite': (
+        r'back-end dbms:\s*sqlite',
+        r'database management system:\s*sqlite',
+        r'the back-end dbms is sqlite',
+    ),
+    'access': (
+        r'back-end dbms:\s*microsoft access',
+        r'database management system:\s*microsoft access',
+        r'the back-end dbms is microsoft access',
+    ),
+}
+DB_TYPES = tuple(DB_TYPE_PATTERNS)
+
+# Database version, first matching pattern wins
+# Pattern: "the back-end DBMS version is X.Y.Z" or "version: X.Y.Z"
+VERSION_PATTERNS = (
+    r'the back-end dbms version is\s*([\d.]+)',
+    r'dbms version:\s*([\d.]+)',
+    r'version:\s*([\d.]+)',
+)
+
+# Literals the patterns above start with; patterns sharing one are scanned together
+ANALYSIS_PREFIXES = (
+    'parameter',
+    'is vulnerable',
+    'payload:',
+    'back-end dbms:',
+    'database management system:',
+    'the back-end dbms ',
+    'dbms version:',
+    'version:',
+)
+
+
+def compile_analysis_regexes():
+    """
+    Combine the analysis patterns that start with the same literal.
+    
+    Patterns sharing a prefix from ANALYSIS_PREFIXES are merged into one
+    regex: the prefix followed by each pattern's remainder as an optional
+    lookahead in its own named group, so "back-end dbms: mysql (injectable)"
+    still counts for both injection and MySQL.  The output is then scanned
+    once per prefix instead of once per pattern.  (One alternation of all
+    patterns is slower: re only skips ahead fast when a regex starts with a
+    literal.)
+    
+    Returns:
+        list: (regex, dict) pairs; the dict maps each group name of the regex
+            to (kind, rank): kind is 'injection', 'db' or 'version', and a
+            lower rank takes precedence (index into DB_TYPES for 'db', into
+            VERSION_PATTERNS for 'version', always 0 for 'injection')
+    
+    Raises:
+        ValueError: If a pattern doesn't start with one of ANALYSIS_PREFIXES, or
+            a version pattern doesn't capture the version in its only group
+    """
+    named = [(f'injection_{i}', 'injection', 0, pattern)
+             for i, pattern in enumerate(INJECTION_PATTERNS)]
+    for rank, (db_type, patterns) in enumerate(DB_TYPE_PATTERNS.items()):
+        named += [(f'db_{db_type}_{i}', 'db', rank, pattern) for i, pattern in enumerate(patterns)]
+    named += [(f'version_{i}', 'version', i, pattern) for i, pattern in enumerate(VERSION_PATTERNS)]
+    
+    rests = {prefix: [] for prefix in ANALYSIS_PREFIXES}
+    lookaheads = {prefix: [] for prefix in ANALYSIS_PREFIXES}
+    ranks = {prefix: {} for prefix in ANALYSIS_PREFIXES}
+    for name, kind, rank, pattern in named:
+        prefixes = [p for p in ANALYSIS_PREFIXES if pattern.startswith(p)]
+        if not prefixes:
+            raise ValueError(f"Analysis pattern {pattern!r} doesn't start with one of ANALYSIS_PREFIXES")
+        prefix = max(prefixes, key=len)
+        rest = pattern[len(prefix):]
+        if kind == 'version':
+            # Only the version number itself is captured: name the first group
+            group = rest.replace('(', f'(?P<{name}>', 1)
+            try:
+                compiled = re.compile(group)
+                named_only = compiled.groups == 1 and compiled.groupindex == {name: 1}
+            except re.error:
+                named_only = False
+            if not named_only:
+                raise ValueError(f"Version pattern {pattern!r} must capture the version "
+                                 f"in its only group, opened by its first '('")
+        else:
+            group = f'(?P<{name}>{rest})'
+        rests[prefix].append(rest)
+        lookaheads[prefix].append(f'(?:(?={group}))?')
+        ranks[prefix][name] = (kind, rank)
+    
+    # The leading (?=...|...) rejects occurrences of the prefix that no pattern
+    # completes (common for "parameter") without returning a match for them
+    return [(re.compile(f'{re.escape(prefix)}(?={"|".join(rests[prefix])}){"".join(lookaheads[prefix])}'),
+             ranks[prefix])
+            for prefix in ANALYSIS_PREFIXES]
+
+
+ANALYSIS_RES = compile_analysis_regexes()
+
+# Start of a target section in the output of a sqlmap -m run:
+#   [1/3] URL:
+#   GET http://host:port/path
+BULK_URL_RE = re.compile(r'^\[\d+/[^\]]*\] URL:\r?\n\w+ (\S+)', re.MULTILINE)
+
+# Note sqlmap puts in its --results-file CSV for injection points it could not confirm
+FALSE_POSITIVE_NOTE = 'false positive or unexploitable'
+
+# Above this many concurrent sqlmap processes throughput usually drops instead of
+# rising (CPU and file descriptor pressure, rate limiting on the target side)
+HIGH_CONCURRENCY = 32
+
+# sqlmap processes started per usable CPU by default: scans mostly wait on the
+# network, but each process still costs some CPU (TLS, response parsing)
+PROCESSES_PER_CPU = 4
+
+
+def default_concurrency():
+    """
+    Compute the default number of concurrent sqlmap processes from the CPUs this
+    process may run on.
+    
+    Returns:
+        int: PROCESSES_PER_CPU per usable CPU, at most HIGH_CONCURRENCY
     """
-    Replace the Host header in HTTP request content.
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        # Not available on Windows/macOS
+        cpus = os.cpu_count() or 1
+    return min(HIGH_CONCURRENCY, PROCESSES_PER_CPU * cpus)
+
+
+# Default number of sqlmap processes run at the same time
+DEFAULT_CONCURRENCY = default_concurrency()
+
+# Number of threads resolving target hosts with --dns-precheck
+DNS_PRECHECK_WORKERS = 64
+
+# Buffer size of the pipe reader for sqlmap's output
+STREAM_LIMIT = 1024 * 1024
+
+# Max bytes taken from sqlmap's output per read
+READ_CHUNK_SIZE = 64 * 1024
+
+# Memory-backed filesystem preferred for temporary request files (Linux)
+SHM_DIR = '/dev/shm'
+
+
+def split_for_host_header(request_content):
+    """
+    Find where to add a Host header to a request that has none: after the
+    request line, before the other headers.
     
     Args:
-        request_content (str): Original HTTP request content
-        new_host (str): New host value (format: host:port)
+        request_content (str): HTTP request content without a Host header
     
     Returns:
-        str: Modified request content with replaced Host header
-    """
-    # Replace {{Hostname}} placeholder if present (avoids regex group-ref issues)
-    if '{{Hostname}}' in request_content:
-        modified = request_content.replace('{{Hostname}}', new_host)
-        return modified
-
-    # Match Host: xxx line (case-insensitive, supports spaces)
-    # Use lambda to avoid "invalid group reference" when new_host starts with a digit (e.g. 8.x.x.x)
-    pattern = r'(?i)^(Host:\s*).*$'
-
-    def repl(m):
-        return m.group(1) + new_host
-
-    modified = re.sub(pattern, repl, request_content, flags=re.MULTILINE)
-
-    # If Host header was not found, add it after the first line (request line)
-    if modified == request_content:
-        lines = request_content.split('\n')
-        if len(lines) > 0:
-            # Find where to insert Host header (after request line, before other headers)
-            insert_pos = 1
-            for i, line in enumerate(lines[1:], start=1):
-                if ':' in line and not line.strip().startswith('HTTP/'):
-                    insert_pos = i
-                    break
-                elif not line.strip():
-                    insert_pos = i
-                    break
-            
-            lines.insert(insert_pos, f'Host: {new_host}')
-            modified = '\n'.join(lines)
+        tuple: (head, tail) - head ends with "Host: ", so the request with the
+            header added is head + host + tail
+    """
+    lines = request_content.split('\n')
+    insert_pos = 1
+    for i, line in enumerate(lines[1:], start=1):
+        if ':' in line and not line.strip().startswith('HTTP/'):
+            insert_pos = i
+            break
+        elif not line.strip():
+            insert_pos = i
+            break
+    
+    head = '\n'.join(lines[:insert_pos]) + '\nHost: '
+    tail = '\n' + '\n'.join(lines[insert_pos:]) if insert_pos < len(lines) else ''
+    return head, tail
+
+
+def is_valid_target(target):
+    """
+    Check that a target has the host:port format.
+    
+    Args:
+        target (str): Target from the bulk file
+    
+    Returns:
+        bool: True if the target has a non-empty host and a valid port
+    """
+    host, _, port = target.rpartition(':')
+    # isdigit() alone also accepts digits int() can't parse, e.g. '²'
+    return bool(host) and port.isascii() and port.isdigit() and 0 < int(port) < 65536
+
+
+def is_resolvable_target(target):
+    """
+    Check that the host of a host:port target resolves.
+    
+    Args:
+        target (str): Target in host:port format
+    
+    Returns:
+        bool: True if DNS resolution succeeded
+    """
+    host, _, port = target.rpartition(':')
+    try:
+        socket.getaddrinfo(host.strip('[]'), int(port), proto=socket.IPPROTO_TCP)
+    except (socket.gaierror, UnicodeError):
+        return False
+    return True
+
+
+def preflight_targets(targets, dns_precheck=False):
+    """
+    Validate and dedupe targets before any sqlmap process is started.
+    
+    Args:
+        targets (iterable): host:port strings from the bulk file
+        dns_precheck (bool): Also drop targets whose host doesn't resolve
+    
+    Returns:
+        tuple: (list, int, int) - Targets to scan in bulk file order, number of
+            rejected targets (invalid format or unresolvable) and number of
+            duplicates skipped
+    """
+    unique_targets = {}
+    rejected = 0
+    duplicates = 0
+    
+    for target in targets:
+        if not is_valid_target(target):
+            logger.info(f"[-] Invalid target format (expected host:port): {target}")
+            rejected += 1
+        elif target in unique_targets:
+            duplicates += 1
+        else:
+            unique_targets[target] = None
+    
+    scan_list = list(unique_targets)
+    
+    if dns_precheck and scan_list:
+        logger.info(f"[*] Resolving {len(scan_list)} target(s)")
+        with ThreadPoolExecutor(max_workers=DNS_PRECHECK_WORKERS) as executor:
+            resolvable = list(executor.map(is_resolvable_target, scan_list))
+        
+        for target, ok in zip(scan_list, resolvable):
+            if not ok:
+                logger.info(f"[-] Could not resolve target: {target}")
+                rejected += 1
+        scan_list = [target for target, ok in zip(scan_list, resolvable) if ok]
+    
+    return scan_list, rejected, duplicates
+
+
+def prepare_template(request_content):
+    """
+    Split the request template around the host value once, so that the request
+    for each target is a plain join instead of a regex pass over the template.
+    
+    Args:
+        request_content (bytes): Original HTTP request content
+    
+    Returns:
+        tuple: Byte chunks of the request; joining them with the encoded host
+            gives the request for that host: every {{Hostname}} replaced, else
+            every Host header value replaced, else a Host header added
+    """
+    # surrogateescape carries bytes that aren't valid UTF-8 (e.g. a GBK body)
+    # through unchanged instead of dropping them
+    request_content = request_content.decode('utf-8', errors='surrogateescape')
+    
+    # {{Hostname}} placeholder(s): the chunks are simply what lies around them
+    parts = request_content.split('{{Hostname}}')
     
-    return modified
+    if len(parts) == 1:
+        # Host header line(s): keep "Host: " and cut out the old value
+        parts = []
+        start = 0
+        for match in HOST_HEADER_RE.finditer(request_content):
+            parts.append(request_content[start:match.end(1)])
+            start = match.end()
+        parts.append(request_content[start:])
+    
+    if len(parts) == 1:
+        # No Host header: the chunks are what lies around the one that gets added
+        parts = split_for_host_header(request_content)
+    
+    return tuple(part.encode('utf-8', errors='surrogateescape') for part in parts)
 
 
 def read_request_file(filepath):
@@ -74,47 +382,255 @@ def read_request_file(filepath):
         filepath (str): Path to the request file
     
     Returns:
-        str: Request file content
+        bytes: Request file content, with newlines normalized to LF
     
     Raises:
         FileNotFoundError: If file doesn't exist
         IOError: If file cannot be read
     """
     try:
-        with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-            return f.read()
+        data = Path(filepath).read_bytes()
     except FileNotFoundError:
         raise FileNotFoundError(f"Request file not found: {filepath}")
     except IOError as e:
         raise IOError(f"Error reading request file {filepath}: {e}")
+    
+    # Same newlines as reading in text mode. The content stays bytes: it is
+    # written out as bytes for every target
+    if b'\r' in data:
+        data = data.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+    return data
 
 
-def read_bulk_file(filepath):
+def read_bulk_targets(filepath):
     """
-    Read bulk file and extract host:port targets.
+    Read bulk file and return the host:port targets in it.
     
     Args:
         filepath (str): Path to the bulk file
     
     Returns:
-        list: List of host:port strings
+        list: host:port strings
     
     Raises:
         FileNotFoundError: If file doesn't exist
         IOError: If file cannot be read
     """
     try:
-        with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-            targets = []
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith('#'):  # Skip empty lines and comments
-                    targets.append(line)
-            return targets
+        data = Path(filepath).read_bytes()
     except FileNotFoundError:
         raise FileNotFoundError(f"Bulk file not found: {filepath}")
     except IOError as e:
         raise IOError(f"Error reading bulk file {filepath}: {e}")
+    
+    # Split and filter the raw bytes, then decode the kept lines all at once
+    lines = [line for line in map(bytes.strip, data.splitlines())
+             if line and not line.startswith(b'#')]  # Skip empty lines and comments
+    if not lines:
+        return []
+    return b'\n'.join(lines).decode('utf-8', errors='ignore').split('\n')
+
+
+def temp_root():
+    """
+    Pick the directory the per-run temporary directory is created in.
+    
+    Returns:
+        str: SHM_DIR if it is a writable directory (tmpfs, so request files
+            never hit the disk), otherwise the system temporary directory
+    """
+    if os.path.isdir(SHM_DIR) and os.access(SHM_DIR, os.W_OK | os.X_OK):
+        return SHM_DIR
+    return tempfile.gettempdir()
+
+
+def write_temp_file(path, data):
+    """
+    Write bytes to a temporary file with raw os.open/os.write calls.
+    
+    Args:
+        path (str): Path of the file to create or truncate
+        data (bytes): File content
+    """
+    # O_BINARY keeps Windows from translating newlines, O_CLOEXEC keeps the fd
+    # out of the sqlmap child processes
+    flags = (os.O_WRONLY | os.O_CREAT | os.O_TRUNC
+             | getattr(os, 'O_BINARY', 0) | getattr(os, 'O_CLOEXEC', 0))
+    fd = os.open(path, flags, 0o600)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+
+def remove_temp_dir(temp_dir):
+    """
+    Delete the run's temporary directory and the files in it.
+    
+    Args:
+        temp_dir (str): Directory holding the temporary files
+    """
+    try:
+        names = os.listdir(temp_dir)
+    except FileNotFoundError:
+        return
+    
+    # One unlink per file: a file that is already gone is not an error, so
+    # there is no need to check for it first
+    for name in names:
+        temp_path = os.path.join(temp_dir, name)
+        try:
+            os.unlink(temp_path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"[!] Warning: Could not delete temporary file {temp_path}: {e}")
+    
+    try:
+        os.rmdir(temp_dir)
+    except OSError as e:
+        logger.warning(f"[!] Warning: Could not delete temporary directory {temp_dir}: {e}")
+
+
+def patch_temp_file(path, offsets, data):
+    """
+    Overwrite bytes of an existing file in place, leaving the rest untouched.
+    
+    Args:
+        path (str): Path of the file
+        offsets (list): Byte offsets to write data at
+        data (bytes): Bytes written at every offset
+    """
+    fd = os.open(path, os.O_WRONLY | getattr(os, 'O_BINARY', 0) | getattr(os, 'O_CLOEXEC', 0))
+    try:
+        for offset in offsets:
+            if hasattr(os, 'pwrite'):
+                written = os.pwrite(fd, data, offset)
+            else:  # Windows
+                os.lseek(fd, offset, os.SEEK_SET)
+                written = os.write(fd, data)
+            if written != len(data):
+                raise IOError(f"Short write to {path}")
+    finally:
+        os.close(fd)
+
+
+def host_offsets(template_chunks, width):
+    """
+    Compute where the host goes in a request whose host is padded to a fixed width.
+    
+    Padding is only safe where sqlmap ignores it: at the end of a header line,
+    as sqlmap strips header values. Hosts in the request line or the body
+    (e.g. a {{Hostname}} placeholder there) can't be padded.
+    
+    Args:
+        template_chunks (tuple): Request template split by prepare_template
+        width (int): Length every host is padded to with spaces
+    
+    Returns:
+        list: Byte offset of every host in the padded request, or None if the
+            host can't be padded
+    """
+    offsets = []
+    position = 0
+    for index, chunk in enumerate(template_chunks[:-1]):
+        position += len(chunk)
+        head = b''.join(template_chunks[:index + 1])
+        line_start = head.rfind(b'\n') + 1
+        if (not template_chunks[index + 1].startswith(b'\n')  # not at the end of the line
+                or line_start == 0  # request line
+                or b'\n\n' in head  # body
+                or b':' not in head[line_start:]):  # not a header
+            return None
+        offsets.append(position)
+        position += width
+    return offsets
+
+
+class OutputAnalyzer:
+    """
+    Analyze sqlmap output incrementally as it arrives, so that the output
+    doesn't have to be kept around for the analysis.
+    """
+    
+    def __init__(self):
+        # Best (lowest) rank found so far per kind, see compile_analysis_regexes
+        self.best = {'injection': 1, 'db': len(DB_TYPES), 'version': len(VERSION_PATTERNS)}
+        self.version = None
+    
+    def can_improve(self, ranks):
+        """
+        Check whether any of the given groups would still change the result.
+        
+        Args:
+            ranks (dict): Group name to (kind, rank), as from compile_analysis_regexes
+        
+        Returns:
+            bool: True if a match of one of the groups would change the result
+        """
+        return any(rank < self.best[kind] for kind, rank in ranks.values())
+    
+    def feed(self, text):
+        """
+        Analyze the next piece of output.
+        
+        Args:
+            text (str): sqlmap output; should end at a line boundary, as the
+                patterns are matched within the piece
+        """
+        # Lowercased only when a scan is still needed: once the result is final
+        # the rest of the output isn't copied at all
+        text_lower = None
+        
+        for regex, ranks in ANALYSIS_RES:
+            # Skip the scan, or stop it early, once nothing it can still find
+            # would change the result
+            if not self.can_improve(ranks):
+                continue
+            if text_lower is None:
+                text_lower = text.lower()
+            for match in regex.finditer(text_lower):
+                for name, value in match.groupdict().items():
+                    if value is None:
+                        continue
+                    kind, rank = ranks[name]
+                    if rank < self.best[kind]:
+                        self.best[kind] = rank
+                        if kind == 'version':
+                            self.version = value
+                if not self.can_improve(ranks):
+                    break
+    
+    def fingerprinted(self):
+        """
+        Check whether injection, DB type and DB version have all been found.
+        
+        Returns:
+            bool: True once all three are known
+        """
+        return (self.best['injection'] == 0 and self.best['db'] < len(DB_TYPES)
+                and self.version is not None)
+    
+    def result(self):
+        """
+        Get the analysis of the output fed so far.
+        
+        Returns:
+            dict: Analysis results with keys: 'injection_detected', 'db_fingerprint', 'db_type', 'db_version'
+        """
+        result = {
+            'injection_detected': self.best['injection'] == 0,
+            'db_fingerprint': False,
+            'db_type': None,
+            'db_version': None
+        }
+        if self.best['db'] < len(DB_TYPES):
+            result['db_fingerprint'] = True
+            result['db_type'] = DB_TYPES[self.best['db']]
+            result['db_version'] = self.version
+        return result
 
 
 def analyze_sqlmap_output(output):
@@ -127,148 +643,748 @@ def analyze_sqlmap_output(output):
     Returns:
         dict: Analysis results with keys: 'injection_detected', 'db_fingerprint', 'db_type', 'db_version'
     """
-    result = {
-        'injection_detected': False,
-        'db_fingerprint': False,
-        'db_type': None,
-        'db_version': None
-    }
-    
-    output_lower = output.lower()
-    
-    # Check for SQL injection detection indicators (more specific patterns)
-    injection_indicators = [
-        r'parameter.*is.*injectable',  # "parameter 'id' is injectable"
-        r'is vulnerable',  # "is vulnerable"
-        r'payload:.*sql',  # "payload: SQL injection"
-        r'back-end dbms:.*\(injectable\)',  # "back-end DBMS: MySQL (injectable)"
-    ]
-    
-    # Check for injection detection
-    for pattern in injection_indicators:
-        if re.search(pattern, output_lower):
-            result['injection_detected'] = True
-            break
+    analyzer = OutputAnalyzer()
+    analyzer.feed(output)
+    return analyzer.result()
+
+
+def build_bulk_urls(request_content, targets, sqlmap_args):
+    """
+    Convert the request template into one URL per target for a single sqlmap -m run.
     
-    # Check for database fingerprint indicators
-    # Look for "back-end DBMS:" or "database management system:" followed by DB type
-    db_patterns = {
-        'mysql': [
-            r'back-end dbms:\s*mysql',
-            r'database management system:\s*mysql',
-            r'the back-end dbms is mysql',
-        ],
-        'postgresql': [
-            r'back-end dbms:\s*postgresql',
-            r'database management system:\s*postgresql',
-            r'the back-end dbms is postgresql',
-        ],
-        'mssql': [
-            r'back-end dbms:\s*microsoft sql server',
-            r'back-end dbms:\s*mssql',
-            r'database management system:\s*microsoft sql server',
-            r'the back-end dbms is microsoft sql server',
-        ],
-        'oracle': [
-            r'back-end dbms:\s*oracle',
-            r'database management system:\s*oracle',
-            r'the back-end dbms is oracle',
-        ],
-        'sqlite': [
-            r'back-end dbms:\s*sqlite',
-            r'database management system:\s*sqlite',
-            r'the back-end dbms is sqlite',
-        ],
-        'access': [
-            r'back-end dbms:\s*microsoft access',
-            r'database management system:\s*microsoft access',
-            r'the back-end dbms is microsoft access',
-        ],
-    }
-    
-    # Check for database type
-    for db_type, patterns in db_patterns.items():
-        for pattern in patterns:
-            match = re.search(pattern, output_lower, re.IGNORECASE)
-            if match:
-                result['db_fingerprint'] = True
-                result['db_type'] = db_type
-                
-                # Try to extract version - look for "version is" or "version:" after DB type
-                # Pattern: "the back-end DBMS version is X.Y.Z" or "version: X.Y.Z"
-                version_patterns = [
-                    r'the back-end dbms version is\s*([\d.]+)',
-                    r'dbms version:\s*([\d.]+)',
-                    r'version:\s*([\d.]+)',
-                ]
-                
-                for vpattern in version_patterns:
-                    vmatch = re.search(vpattern, output_lower, re.IGNORECASE)
-                    if vmatch:
-                        result['db_version'] = vmatch.group(1)
-                        break
-                
-                break
-        if result['db_fingerprint']:
-            break
+    This only works when the targets' requests differ in the Host header alone,
+    so that method, headers and body can be passed once on sqlmap's command line.
+    
+    Args:
+        request_content (str): HTTP request template content
+        targets (list): List of host:port strings
+        sqlmap_args (list): Additional arguments to pass to sqlmap
+    
+    Returns:
+        tuple: (dict, list) - Mapping of target to URL and the extra sqlmap
+            arguments describing the request, or None if the request can't be
+            expressed as URL + options (fall back to one -r run per target)
+    """
+    parts = HEADERS_END_RE.split(request_content, maxsplit=1)
+    head, body = parts[0], parts[1] if len(parts) > 1 else ''
+    lines = head.splitlines()
+    if not lines:
+        return None
+    
+    request_line = lines[0].split()
+    if len(request_line) != 3 or not request_line[2].upper().startswith('HTTP/'):
+        return None
+    method, path = request_line[0].upper(), request_line[1]
+    # Absolute-form request targets already carry a host
+    if not path.startswith('/') or '{{Hostname}}' in path:
+        return None
+    
+    extra_args = []
+    headers = []
+    for line in lines[1:]:
+        name, sep, value = line.partition(':')
+        if not sep:
+            return None
+        name, value = name.strip(), value.strip()
+        if name.lower() == 'host':
+            continue
+        # Any other host-specific content makes the requests differ per target
+        if '{{Hostname}}' in value:
+            return None
+        if name.lower() == 'content-length':
+            # sqlmap computes it from --data
+            continue
+        if name.lower() == 'cookie':
+            extra_args.append(f'--cookie={value}')
+        else:
+            headers.append(f'{name}: {value}')
+    
+    body = body.rstrip('\r\n')
+    # Multi-line bodies (e.g. multipart) can't be passed through --data reliably
+    if '\n' in body or '\r' in body or '{{Hostname}}' in body:
+        return None
+    # sqlmap -m drops bulk lines without GET parameters or a * marker unless
+    # there is --data ("no usable links found"), so nothing would be tested
+    if not body and '?' not in path and '*' not in path:
+        return None
     
-    return result
+    if headers:
+        extra_args.append('--headers=' + '\n'.join(headers))
+    if body:
+        extra_args.append(f'--data={body}')
+    if method != 'GET' and not (method == 'POST' and body):
+        extra_args.append(f'--method={method}')
+    
+    # Same scheme choice sqlmap makes for -r request files
+    force_ssl = '--force-ssl' in sqlmap_args
+    urls = {}
+    for target in targets:
+        scheme = 'https' if force_ssl or target.rsplit(':', 1)[-1] == '443' else 'http'
+        urls[target] = f"{scheme}://{target}{path}"
+    
+    return urls, extra_args
 
 
-def run_sqlmap(request_file, sqlmap_path, sqlmap_args):
+class BulkProgress:
+    """
+    Follow the output of a sqlmap -m run as it streams in and hand over the
+    analysis of each tested URL as soon as sqlmap moves on to the next one.
+    """
+    
+    def __init__(self, on_done):
+        """
+        Args:
+            on_done (callable): Called with (url, OutputAnalyzer) once the output
+                for a URL is complete
+        """
+        self.on_done = on_done
+        self.url = None
+        self.analyzer = None
+        # Last line of the previous piece: a URL marker may continue in the next one
+        self.carry = ''
+    
+    def feed(self, text):
+        """
+        Process the next piece of output.
+        
+        Args:
+            text (str): sqlmap output, ending at a line boundary
+        """
+        if not text:
+            return
+        start = 0
+        for match in BULK_URL_RE.finditer(self.carry + text):
+            # A marker that starts in the carried line has its first line in the
+            # previous URL's output already; no analysis pattern matches it
+            end = max(match.start() - len(self.carry), 0)
+            self.finish(text[start:end])
+            self.url = match.group(1)
+            self.analyzer = OutputAnalyzer()
+            start = end
+        if self.analyzer is not None:
+            self.analyzer.feed(text[start:])
+        self.carry = text[text.rfind('\n', 0, len(text) - 1) + 1:]
+    
+    def finish(self, text=''):
+        """
+        Hand over the URL currently being tested.
+        
+        Args:
+            text (str): Rest of its output
+        """
+        if self.analyzer is not None:
+            self.analyzer.feed(text)
+            self.on_done(self.url, self.analyzer)
+            self.analyzer = None
+
+
+def split_host_rounds(targets):
+    """
+    Split targets into rounds in which every hostname occurs at most once.
+    
+    sqlmap -m remembers tested parameters by hostname and path, without the
+    port, so host:8080 after host:80 would only be logged as "skipping". The
+    first round holds the first port of every host, the second round the
+    second one, and so on.
+    
+    Args:
+        targets (list): List of host:port strings
+    
+    Returns:
+        list: Lists of targets, each in bulk file order
+    """
+    rounds = []
+    seen = {}
+    for target in targets:
+        host = target.rpartition(':')[0].strip('[]').lower()
+        count = seen.get(host, 0)
+        seen[host] = count + 1
+        if count == len(rounds):
+            rounds.append([])
+        rounds[count].append(target)
+    return rounds
+
+
+def read_results_csv(path):
+    """
+    Read the URLs sqlmap found injectable from the --results-file CSV of a -m run.
+    
+    The CSV has one row per injection point: Target URL, Place, Parameter,
+    Technique(s), Note(s).
+    
+    Args:
+        path (str): Path to the CSV results file
+    
+    Returns:
+        set: URLs with at least one confirmed injection point, or None if the
+            file can't be read (e.g. sqlmap didn't get as far as creating it)
+    """
+    try:
+        with open(path, newline='', encoding='utf-8', errors='replace') as f:
+            rows = list(csv.reader(f))
+    except OSError:
+        return None
+    
+    injected = set()
+    for row in rows[1:]:  # Skip the header
+        # Notes are not quoted by sqlmap, so they may span several columns
+        if len(row) >= 5 and FALSE_POSITIVE_NOTE not in ','.join(row[4:]):
+            injected.add(row[0])
+    return injected
+
+
+def format_result_line(target_info):
+    """
+    Format a successful target as a line of the result file.
+    
+    Args:
+        target_info (dict or str): Successful target with database info
+    
+    Returns:
+        str: Result line without trailing newline
+    """
+    # 如果是字典格式（包含数据库信息），格式化输出
+    if isinstance(target_info, dict):
+        line = target_info['target']
+        if target_info.get('db_type'):
+            line += f" | DB: {target_info['db_type']}"
+            if target_info.get('db_version'):
+                line += f" {target_info['db_version']}"
+        if target_info.get('injection_detected'):
+            line += " | SQL Injection: Yes"
+        return line
+    # 兼容旧格式（字符串）
+    return str(target_info)
+
+
+class RequestFile:
+    """
+    Temporary request file reused by the targets scanned in one concurrency slot.
+    
+    When the host can be padded (see host_offsets), the request is written in
+    full only once; for every further target just the padded host is patched
+    in place instead of rewriting the whole request.
+    """
+    
+    def __init__(self, path, template_chunks, offsets=None, width=0):
+        """
+        Args:
+            path (str): Path of the request file
+            template_chunks (tuple): Request template split by prepare_template
+            offsets (list): Host offsets from host_offsets, or None to rewrite the
+                whole request for every target
+            width (int): Length hosts are padded to (with offsets)
+        """
+        self.path = path
+        self.template_chunks = template_chunks
+        self.offsets = offsets
+        self.width = width
+        self.written = False
+    
+    def write(self, target):
+        """
+        Make the file hold the request for a target.
+        
+        Args:
+            target (str): Target in host:port format
+        """
+        host = target.encode('utf-8')
+        if self.offsets is None:
+            write_temp_file(self.path, host.join(self.template_chunks))
+            return
+        
+        host = host.ljust(self.width)
+        if self.written:
+            patch_temp_file(self.path, self.offsets, host)
+        else:
+            write_temp_file(self.path, host.join(self.template_chunks))
+            self.written = True
+
+
+class ResultWriter:
+    """
+    Write successful targets to the result file as soon as they are found, so
+    that results of an interrupted scan are not lost.
+    """
+    
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Path of the result file
+        """
+        self.path = path
+        self.count = 0
+        self.file = None
+        self.failed = False
+        self.pending = []
+    
+    def write(self, target_info, flush=True):
+        """
+        Append a successful target to the result file.
+        
+        Args:
+            target_info (dict or str): Successful target with database info
+            flush (bool): Write it out right away; pass False when a batch of
+                results arrives at once and call flush() after the last one
+        """
+        if self.failed:
+            return
+        self.pending.append(format_result_line(target_info) + '\n')
+        self.count += 1
+        if flush:
+            self.flush()
+    
+    def flush(self):
+        """Write all pending results to the result file in one go."""
+        if self.failed or not self.pending:
+            return
+        try:
+            if self.file is None:
+                # Opened on the first result, so a run without results leaves an
+                # existing result file untouched
+                self.file = open(self.path, 'w', encoding='utf-8')
+            self.file.write(''.join(self.pending))
+            self.file.flush()
+        except Exception as e:
+            self.failed = True
+            self.count -= len(self.pending)
+            logger.warning(f"[!] Warning: Could not write to {self.path}: {e}")
+        self.pending.clear()
+    
+    def close(self):
+        """Write pending results and close the result file if it was opened."""
+        self.flush()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def record_result(target, returncode, analysis, stats, results):
+    """
+    Report the outcome of a scan and update the statistics.
+    
+    Args:
+        target (str): Target in host:port format
+        returncode (int): sqlmap exit code, None if sqlmap was interrupted
+        analysis (dict): Result of analyze_sqlmap_output
+        stats (dict): Scan statistics, updated in place
+        results (ResultWriter): Writer for successful targets
+    """
+    # Only consider it successful if SQL injection was detected or database fingerprint was obtained
+    is_successful = analysis['injection_detected'] or analysis['db_fingerprint']
+    
+    if is_successful:
+        db_info = ""
+        if analysis['db_type']:
+            db_info = f" (DB: {analysis['db_type']}"
+            if analysis['db_version']:
+                db_info += f" {analysis['db_version']}"
+            db_info += ")"
+        
+        logger.info(f"[+] SQL injection detected or database fingerprint obtained for {target}{db_info}")
+        stats['successful'] += 1
+        # 记录成功的资产，包含数据库信息
+        target_info = {
+            'target': target,
+            'injection_detected': analysis['injection_detected'],
+            'db_type': analysis['db_type'],
+            'db_version': analysis['db_version']
+        }
+        results.write(target_info)
+    else:
+        if returncode is None:
+            logger.info(f"[-] Scan interrupted for {target}")
+        elif returncode == 0:
+            logger.info(f"[-] Scan completed but no SQL injection detected for {target} (exit code: {returncode})")
+        else:
+            logger.info(f"[-] Scan failed for {target} (exit code: {returncode})")
+        stats['failed'] += 1
+
+
+def echo_output(raw, label):
+    """
+    Echo the buffered output of one sqlmap run as a single block.
+    
+    Args:
+        raw (bytes): Output as read from sqlmap
+        label (str): Prefix for every line, e.g. the target
+    """
+    prefix = f"[{label}] "
+    lines = bytes(raw).split(b'\n')
+    if not lines[-1]:
+        lines.pop()  # nothing after the final newline
+    if raw_output is not None:
+        raw_prefix = prefix.encode(SQLMAP_ENCODING, errors='replace')
+        raw_output.write(b''.join(raw_prefix + line + b'\n' for line in lines))
+        if INTERACTIVE:
+            raw_output.flush()
+    elif lines:
+        logger.info('\n'.join(prefix + line.decode(SQLMAP_ENCODING, errors='replace').rstrip('\r')
+                              for line in lines))
+
+
+async def run_sqlmap(request_file, sqlmap_path, sqlmap_args, label=None, input_option='-r',
+                     stdin_data=None, on_output=None, stop_on_fingerprint=False):
     """
     Run sqlmap with the given request file and arguments.
     
     Args:
         request_file (str): Path to the request file
         sqlmap_path (str): Path to sqlmap.py
-        sqlmap_args (list): Additional arguments to pass to sqlmap
+        sqlmap_args (tuple): Additional arguments to pass to sqlmap
+        label (str): Optional prefix for echoed output lines, used when several
+            sqlmap processes run concurrently. The output is then echoed as one
+            block once sqlmap exits, so transcripts of different targets don't
+            interleave
+        input_option (str): sqlmap option used to pass the file ('-r' for a
+            request file, '-m' for a bulk file of URLs)
+        stdin_data (bytes): Optional data written to sqlmap's stdin (used with
+            request_file '-' to pass the request without a file)
+        on_output (callable): Called with each piece of decoded output (ending at
+            a line boundary, except the last one) instead of analyzing it here;
+            the returned analysis is empty then
+        stop_on_fingerprint (bool): Terminate sqlmap as soon as injection, DB
+            type and DB version have all been found
     
     Returns:
-        tuple: (subprocess.CompletedProcess, dict) - Result and analysis dict
+        tuple: (subprocess.CompletedProcess, dict) - Result (stdout is None,
+            the output is analyzed while reading) and analysis dict
     """
+    # sqlmap is deliberately run out of process: it patches the HTTP stack and other
+    # stdlib modules at startup (dirtyPatches), keeps its state in module globals
+    # (conf/kb) and may exit the interpreter, so it can't be imported once and reused
+    # for every target (sqlmap's own library facade runs a subprocess for the same
+    # reasons). --single-process pays the startup cost once for all targets instead.
     # Build command: python sqlmap.py -r <request_file> [other_args]
-    cmd = [sys.executable, sqlmap_path, '-r', request_file] + sqlmap_args
+    cmd = (sys.executable, sqlmap_path, input_option, request_file, *sqlmap_args)
     
-    print(f"Running: {' '.join(cmd)}")
+    logger.info(f"Running: {' '.join(cmd)}")
     
     # Run sqlmap and capture output while showing it in real-time
-    process = subprocess.Popen(
-        cmd,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.STDOUT,
-        text=True,
-        bufsize=1,
-        universal_newlines=True
+    # Keep the spawn on CPython's cheap path (posix_spawn, or vfork on Linux) rather
+    # than a fork that copies the page tables: an absolute executable, no
+    # preexec_fn/cwd/session/user options, and close_fds=False. Not closing fds is
+    # safe because every fd this process opens is non-inheritable (PEP 446, and
+    # O_CLOEXEC in write_temp_file)
+    if stdin_data is not None:
+        stdin = asyncio.subprocess.PIPE
+    elif label:
+        # Buffered output of a concurrent scan: a prompt could neither be seen
+        # nor answered, and the scans would compete for the terminal's input
+        stdin = asyncio.subprocess.DEVNULL
+    else:
+        stdin = None
+    process = await asyncio.create_subprocess_exec(
+        *cmd,
+        executable=sys.executable,
+        stdin=stdin,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT,
+        close_fds=False,
+        limit=STREAM_LIMIT
     )
     
-    output_lines = []
-    # Read output line by line and display in real-time
-    for line in process.stdout:
-        print(line, end='', flush=True)
-        output_lines.append(line)
-    
-    # Wait for process to complete
-    returncode = process.wait()
-    
-    # Combine all output
-    output = ''.join(output_lines)
+    analyzer = OutputAnalyzer()
+    decoder = codecs.getincrementaldecoder(SQLMAP_ENCODING)(errors='replace')
+    # Raw output, only kept when it is needed after sqlmap exits
+    raw = bytearray() if label else None
+    try:
+        if stdin_data is not None:
+            # sqlmap reads the whole request until EOF, so close stdin right away
+            process.stdin.write(stdin_data)
+            await process.stdin.drain()
+            process.stdin.close()
+        
+        # Read output in chunks of whatever is available and display it in
+        # real-time, unless it is buffered for a concurrent scan. On the console
+        # the raw bytes are passed through as-is. Complete lines are analyzed
+        # (and logged with --quiet) as they arrive
+        pending = ''  # incomplete last line, handled once the rest arrives
+        while chunk := await process.stdout.read(READ_CHUNK_SIZE):
+            if raw is not None:
+                raw += chunk
+            if not label and raw_output is not None:
+                raw_output.write(chunk)
+                if INTERACTIVE:
+                    raw_output.flush()
+            
+            text = pending + decoder.decode(chunk)
+            cut = text.rfind('\n') + 1
+            pending = text[cut:]
+            if not cut:
+                continue
+            if on_output:
+                on_output(text[:cut])
+            else:
+                analyzer.feed(text[:cut])
+            if not label and raw_output is None:
+                for line in text[:cut - 1].split('\n'):
+                    logger.info(line.rstrip('\r'))
+            
+            if stop_on_fingerprint and analyzer.fingerprinted():
+                logger.info(f"[*] Injection and DB fingerprint found, stopping sqlmap"
+                            f"{f' for {label}' if label else ''}")
+                process.terminate()
+                pending = ''
+                break
+        
+        pending += decoder.decode(b'', final=True)
+        if pending:
+            if on_output:
+                on_output(pending)
+            else:
+                analyzer.feed(pending)
+            if not label and raw_output is None:
+                logger.info(pending.rstrip('\r'))
+        
+        # Wait for process to complete
+        returncode = await process.wait()
+    except asyncio.CancelledError:
+        # Don't leave orphaned sqlmap processes behind on Ctrl-C
+        if process.returncode is None:
+            try:
+                process.kill()
+            except ProcessLookupError:
+                pass  # exited in the meantime
+            # Reap it while the event loop still runs; otherwise its transport is
+            # only cleaned up after asyncio.run has closed the loop
+            await asyncio.shield(process.wait())
+        raise
+    finally:
+        if label:
+            echo_output(raw, label)
     
-    # Analyze output
-    analysis = analyze_sqlmap_output(output)
+    analysis = analyzer.result()
     
     # Create a CompletedProcess-like object
     result = subprocess.CompletedProcess(
         cmd,
         returncode,
-        output,
+        None,
         None
     )
     
     return result, analysis
 
 
-def process_bulk_scan(bulk_file, request_template, sqlmap_path, sqlmap_args):
+async def scan_target(index, total, target, template_chunks, sqlmap_path, sqlmap_args,
+                      stats, results, request_file, label=None, use_stdin=False,
+                      stop_on_fingerprint=False):
+    """
+    Scan a single target: replace Host header, write the request file and run sqlmap.
+    
+    Args:
+        index (int): 1-based position of the target in the bulk file
+        total (int): Total number of targets
+        target (str): Target in host:port format
+        template_chunks (tuple): Request template split by prepare_template
+        sqlmap_path (str): Path to sqlmap.py
+        sqlmap_args (list): Additional arguments to pass to sqlmap
+        stats (dict): Shared scan statistics, updated in place
+        results (ResultWriter): Writer for successful targets
+        request_file (RequestFile): Request file to (re)write for this target;
+            it is reused by the next target once this scan is done
+        label (str): Optional prefix for echoed sqlmap output
+        use_stdin (bool): Pass the request through sqlmap's stdin ('-r -')
+            instead of a temporary file
+        stop_on_fingerprint (bool): Terminate sqlmap once injection, DB type
+            and DB version have been found
+    """
+    logger.info(f"\n{'='*60}")
+    logger.info(f"[{index}/{total}] Processing target: {target}")
+    logger.info(f"{'='*60}")
+    
+    if not use_stdin:
+        # Write request file (replaces the previous target's request)
+        try:
+            request_file.write(target)
+            
+            logger.info(f"[*] Wrote request file: {request_file.path}")
+        except Exception as e:
+            logger.error(f"[-] Error writing request file: {e}")
+            stats['failed'] += 1
+            return
+    
+    # Run sqlmap
+    try:
+        if use_stdin:
+            # Replace Host header
+            modified_request = target.encode('utf-8').join(template_chunks)
+            result, analysis = await run_sqlmap('-', sqlmap_path, sqlmap_args, label,
+                                                stdin_data=modified_request,
+                                                stop_on_fingerprint=stop_on_fingerprint)
+        else:
+            result, analysis = await run_sqlmap(request_file.path, sqlmap_path, sqlmap_args, label,
+                                                stop_on_fingerprint=stop_on_fingerprint)
+        
+        record_result(target, result.returncode, analysis, stats, results)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.error(f"[-] Error running sqlmap: {e}")
+        stats['failed'] += 1
+
+
+async def scan_targets(targets, template_chunks, sqlmap_path, sqlmap_args, concurrency,
+                       stats, results, temp_dir, use_stdin=False, stop_on_fingerprint=False):
+    """
+    Scan all targets, running at most `concurrency` sqlmap processes at a time.
+    
+    Args:
+        targets (list): List of host:port strings
+        template_chunks (tuple): Request template split by prepare_template
+        sqlmap_path (str): Path to sqlmap.py
+        sqlmap_args (list): Additional arguments to pass to sqlmap
+        concurrency (int): Maximum number of concurrent sqlmap processes
+        stats (dict): Shared scan statistics, updated in place
+        results (ResultWriter): Writer for successful targets
+        temp_dir (str): Directory holding the temporary request files
+        use_stdin (bool): Pass requests through sqlmap's stdin instead of temporary files
+        stop_on_fingerprint (bool): Terminate each sqlmap once injection, DB type
+            and DB version have been found
+    """
+    total = len(targets)
+    # No point in more slots than targets
+    concurrency = min(concurrency, total) or 1
+    semaphore = asyncio.Semaphore(concurrency)
+    running = set()
+    # Only prefix sqlmap output when several scans may interleave
+    prefix_output = concurrency > 1
+    if prefix_output and '--batch' not in sqlmap_args:
+        # Buffered output hides sqlmap's [Y/n] prompts until the scan is over
+        logger.info("[!] Adding --batch: sqlmap can't ask questions while several scans run at once")
+        sqlmap_args = (*sqlmap_args, '--batch')
+    # One request file per concurrent scan, reused for every target that runs
+    # in that slot instead of creating and unlinking a file per target. With
+    # every host padded to the longest one, a target only patches its host in
+    width = max(len(target.encode('utf-8')) for target in targets) if targets else 0
+    offsets = host_offsets(template_chunks, width)
+    free_slots = [RequestFile(os.path.join(temp_dir, f'sqlmap_request_{slot}.txt'),
+                              template_chunks, offsets, width)
+                  for slot in range(concurrency)]
+    
+    async def bounded_scan(index, target):
+        request_file = free_slots.pop()
+        try:
+            await scan_target(index, total, target, template_chunks, sqlmap_path, sqlmap_args,
+                              stats, results, request_file,
+                              target if prefix_output else None, use_stdin,
+                              stop_on_fingerprint)
+        finally:
+            free_slots.append(request_file)
+            semaphore.release()
+    
+    # No separate pipeline that starts the next sqlmap while the previous output
+    # is analyzed: the output is analyzed while it streams in, so by the time a
+    # sqlmap exits only its result line is left to log and the slot is handed
+    # to the next target right away. Starting it earlier would run more sqlmap
+    # processes than --concurrency allows
+    for index, target in enumerate(targets, 1):
+        # Wait for a free slot before starting the next target, so only the
+        # scans that are actually running exist as tasks
+        await semaphore.acquire()
+        task = asyncio.create_task(bounded_scan(index, target))
+        running.add(task)
+        task.add_done_callback(running.discard)
+    
+    await asyncio.gather(*running)
+
+
+async def scan_targets_single_run(targets, urls, extra_args, sqlmap_path, sqlmap_args,
+                                  stats, results, temp_dir):
+    """
+    Scan all targets with a single sqlmap invocation using a bulk file of URLs,
+    or one per port round when a host is listed with several ports.
+    
+    Args:
+        targets (list): List of host:port strings
+        urls (dict): Mapping of target to URL (from build_bulk_urls)
+        extra_args (list): sqlmap arguments describing the request (from build_bulk_urls)
+        sqlmap_path (str): Path to sqlmap.py
+        sqlmap_args (list): Additional arguments to pass to sqlmap
+        stats (dict): Shared scan statistics, updated in place
+        results (ResultWriter): Writer for successful targets
+        temp_dir (str): Directory holding the temporary request files
+    """
+    rounds = split_host_rounds(targets)
+    if len(rounds) > 1:
+        logger.info(f"[*] Some hosts are listed with several ports, running sqlmap "
+                    f"{len(rounds)} times (each host at most once per run)")
+    
+    # Let sqlmap record the injection points it found in a CSV file, unless the
+    # user asked for one somewhere else (that file may hold earlier runs too)
+    own_results_file = not any(arg.split('=', 1)[0] == '--results-file' for arg in sqlmap_args)
+    
+    for number, round_targets in enumerate(rounds, 1):
+        temp_path = os.path.join(temp_dir, f'sqlmap_bulk_{number}.txt')
+        write_temp_file(temp_path, ''.join(urls[target] + '\n' for target in round_targets).encode('utf-8'))
+        logger.info(f"[*] Created temporary bulk file: {temp_path}")
+        
+        results_csv = None
+        round_args = extra_args
+        if own_results_file:
+            results_csv = os.path.join(temp_dir, f'sqlmap_results_{number}.csv')
+            round_args = (*extra_args, f'--results-file={results_csv}')
+        
+        await scan_bulk_round(round_targets, urls, temp_path, results_csv,
+                              sqlmap_path, (*round_args, *sqlmap_args), stats, results)
+
+
+async def scan_bulk_round(targets, urls, bulk_path, results_csv, sqlmap_path, sqlmap_args,
+                          stats, results):
+    """
+    Run sqlmap -m once for targets with distinct hostnames and record the results.
+    
+    Args:
+        targets (list): host:port strings, no hostname twice
+        urls (dict): Mapping of target to URL (from build_bulk_urls)
+        bulk_path (str): Bulk file listing the targets' URLs
+        results_csv (str): CSV results file sqlmap writes, or None
+        sqlmap_path (str): Path to sqlmap.py
+        sqlmap_args (tuple): All arguments to pass to sqlmap after the bulk file
+        stats (dict): Shared scan statistics, updated in place
+        results (ResultWriter): Writer for successful targets
+    """
+    url_targets = {urls[target]: target for target in targets}
+    # While sqlmap runs, a URL is done once sqlmap has moved on to the next one
+    returncode = 0
+    
+    def record(url, analyzer):
+        target = url_targets.pop(url, None)
+        if target is None:
+            return
+        # DB type and version are only in the output. A row in sqlmap's own CSV
+        # confirms injection; a missing row proves nothing (the header is written
+        # up front, and an interrupted target may never get its row), so the
+        # output analysis still counts then. sqlmap saves a URL's rows before it
+        # moves on to the next URL
+        analysis = analyzer.result()
+        if results_csv and url in (read_results_csv(results_csv) or ()):
+            analysis['injection_detected'] = True
+        record_result(target, returncode, analysis, stats, results)
+    
+    # Each target is recorded while sqlmap is still running, so the results of
+    # an interrupted run are not lost
+    progress = BulkProgress(record)
+    try:
+        result, _ = await run_sqlmap(bulk_path, sqlmap_path, sqlmap_args,
+                                     input_option='-m', on_output=progress.feed)
+        returncode = result.returncode
+    except asyncio.CancelledError:
+        returncode = None
+        raise
+    finally:
+        # Also on Ctrl-C: the URL being tested keeps what was found so far
+        progress.finish()
+    
+    for target in url_targets.values():
+        logger.info(f"[-] Target was not tested by sqlmap: {target}")
+        stats['failed'] += 1
+
+
+def process_bulk_scan(bulk_file, request_template, sqlmap_path, sqlmap_args,
+                      concurrency=DEFAULT_CONCURRENCY, single_process=False, use_stdin=False,
+                      dns_precheck=False, stop_on_fingerprint=False, result_file=RESULT_FILE):
     """
     Process bulk scan: replace Host header for each target and run sqlmap.
     
@@ -277,130 +1393,98 @@ def process_bulk_scan(bulk_file, request_template, sqlmap_path, sqlmap_args):
         request_template (str): Path to HTTP request file template
         sqlmap_path (str): Path to sqlmap.py
         sqlmap_args (list): Additional arguments to pass to sqlmap
+        concurrency (int): Maximum number of concurrent sqlmap processes
+        single_process (bool): Scan all targets with one sqlmap -m run when the
+            request can be expressed as URLs
+        use_stdin (bool): Pass requests through sqlmap's stdin ('-r -', needs a
+            recent sqlmap) instead of temporary files
+        dns_precheck (bool): Skip targets whose host doesn't resolve
+        stop_on_fingerprint (bool): Terminate each sqlmap once injection, DB type
+            and DB version have been found (not with a single sqlmap -m run)
+        result_file (str): File successful targets are written to
     
     Returns:
-        dict: Statistics about the scan (successful, failed, total)
+        dict: Statistics about the scan (successful, failed, total, saved)
     """
-    # Read bulk file
-    print(f"[*] Reading bulk file: {bulk_file}")
-    targets = read_bulk_file(bulk_file)
+    # Resolve and freeze what is the same for every sqlmap command once: an
+    # absolute path so the exec doesn't resolve it against the cwd every time,
+    # and a tuple so the arguments are not copied into a new list per target
+    sqlmap_path = os.path.abspath(sqlmap_path)
+    sqlmap_args = tuple(sqlmap_args)
+    
+    # Read bulk file, dropping invalid and duplicate targets up front so they
+    # never cost a sqlmap run
+    logger.info(f"[*] Reading bulk file: {bulk_file}")
+    targets, rejected, duplicates = preflight_targets(read_bulk_targets(bulk_file), dns_precheck)
+    
+    if duplicates:
+        logger.info(f"[*] Skipped {duplicates} duplicate target(s)")
     
     if not targets:
-        print("[-] No targets found in bulk file!")
-        return {'total': 0, 'successful': 0, 'failed': 0}
+        if rejected:
+            # Rejected targets count as failed, as they do below
+            logger.info("[-] No valid targets left to scan!")
+        else:
+            logger.info("[-] No targets found in bulk file!")
+        return {'total': rejected, 'successful': 0, 'failed': rejected}
     
-    print(f"[*] Found {len(targets)} target(s)")
+    logger.info(f"[*] Found {len(targets)} target(s) to scan")
     
     # Read request template
-    print(f"[*] Reading request template: {request_template}")
+    logger.info(f"[*] Reading request template: {request_template}")
     template = read_request_file(request_template)
     
     # Statistics
-    stats = {'total': len(targets), 'successful': 0, 'failed': 0}
-    successful_targets = []  # 记录成功的资产
-    temp_files = []
+    # Rejected targets count as failed, as they did when checked in the scan loop
+    stats = {'total': len(targets) + rejected, 'successful': 0, 'failed': rejected}
+    # 成功的资产在发现时立即写入结果文件
+    results = ResultWriter(result_file)
+    # All temporary files of this run live in one directory, removed at the end
+    temp_dir = tempfile.mkdtemp(prefix='sqlmap_bulk_', dir=temp_root())
     
-    try:
-        # Process each target
-        for i, target in enumerate(targets, 1):
-            print(f"\n{'='*60}")
-            print(f"[{i}/{len(targets)}] Processing target: {target}")
-            print(f"{'='*60}")
-            
-            # Validate target format (basic check)
-            if ':' not in target:
-                print(f"[-] Invalid target format (expected host:port): {target}")
-                stats['failed'] += 1
-                continue
-            
-            # Replace Host header
-            try:
-                modified_request = replace_host_in_request(template, target)
-            except Exception as e:
-                print(f"[-] Error replacing Host header: {e}")
-                stats['failed'] += 1
-                continue
-            
-            # Create temporary file
-            try:
-                # Use a more descriptive temp file name for debugging
-                safe_target = target.replace(':', '_').replace('/', '_')
-                temp_file = tempfile.NamedTemporaryFile(
-                    mode='w',
-                    delete=False,
-                    suffix='.txt',
-                    prefix=f'sqlmap_request_{safe_target}_',
-                    dir=os.getcwd()
-                )
-                temp_file.write(modified_request)
-                temp_file.close()
-                temp_path = temp_file.name
-                temp_files.append(temp_path)
-                
-                print(f"[*] Created temporary request file: {temp_path}")
-            except Exception as e:
-                print(f"[-] Error creating temporary file: {e}")
-                stats['failed'] += 1
-                continue
-            
-            # Run sqlmap
-            try:
-                result, analysis = run_sqlmap(temp_path, sqlmap_path, sqlmap_args)
-                
-                # Only consider it successful if SQL injection was detected or database fingerprint was obtained
-                is_successful = analysis['injection_detected'] or analysis['db_fingerprint']
-                
-                if is_successful:
-                    db_info = ""
-                    if analysis['db_type']:
-                        db_info = f" (DB: {analysis['db_type']}"
-                        if analysis['db_version']:
-                            db_info += f" {analysis['db_version']}"
-                        db_info += ")"
-                    
-                    print(f"[+] SQL injection detected or database fingerprint obtained for {target}{db_info}")
-                    stats['successful'] += 1
-                    # 记录成功的资产，包含数据库信息
-                    target_info = {
-                        'target': target,
-                        'injection_detected': analysis['injection_detected'],
-                        'db_type': analysis['db_type'],
-                        'db_version': analysis['db_version']
-                    }
-                    successful_targets.append(target_info)
-                else:
-                    if result.returncode == 0:
-                        print(f"[-] Scan completed but no SQL injection detected for {target} (exit code: {result.returncode})")
-                    else:
-                        print(f"[-] Scan failed for {target} (exit code: {result.returncode})")
-                    stats['failed'] += 1
-            except KeyboardInterrupt:
-                print("\n[!] Interrupted by user")
-                raise
-            except Exception as e:
-                print(f"[-] Error running sqlmap: {e}")
-                stats['failed'] += 1
-            finally:
-                # Clean up temporary file
-                try:
-                    if os.path.exists(temp_path):
-                        os.unlink(temp_path)
-                        print(f"[*] Cleaned up temporary file: {temp_path}")
-                except Exception as e:
-                    print(f"[!] Warning: Could not delete temporary file {temp_path}: {e}")
+    # Try to collapse all targets into a single sqlmap -m run
+    bulk_plan = None
+    if single_process:
+        bulk_plan = build_bulk_urls(template.decode('utf-8', errors='ignore'), targets, sqlmap_args)
+        if bulk_plan is None:
+            logger.info("[!] Request can't be converted to URLs, running sqlmap once per target")
+        elif stop_on_fingerprint:
+            logger.info("[!] --stop-on-fingerprint has no effect on a single sqlmap -m run")
     
+    try:
+        if bulk_plan is not None:
+            urls, extra_args = bulk_plan
+            asyncio.run(scan_targets_single_run(
+                targets,
+                urls,
+                extra_args,
+                sqlmap_path,
+                sqlmap_args,
+                stats,
+                results,
+                temp_dir
+            ))
+        else:
+            asyncio.run(scan_targets(
+                targets,
+                prepare_template(template),
+                sqlmap_path,
+                sqlmap_args,
+                concurrency,
+                stats,
+                results,
+                temp_dir,
+                use_stdin,
+                stop_on_fingerprint
+            ))
     except KeyboardInterrupt:
-        print("\n[!] Interrupted by user. Cleaning up...")
+        logger.info("\n[!] Interrupted by user. Cleaning up...")
     finally:
+        results.close()
         # Clean up any remaining temporary files
-        for temp_path in temp_files:
-            try:
-                if os.path.exists(temp_path):
-                    os.unlink(temp_path)
-            except Exception:
-                pass
+        remove_temp_dir(temp_dir)
     
-    stats['successful_targets'] = successful_targets  # 将成功资产列表添加到返回结果
+    stats['saved'] = results.count
     return stats
 
 
@@ -424,6 +1508,9 @@ Examples:
   
   # With additional sqlmap options
   python sqlmap_bulk_host.py -m hosts.txt -r request.txt -- --batch --level=5 --risk=3 --threads=10
+  
+  # Scan 16 targets at a time
+  python sqlmap_bulk_host.py -m hosts.txt -r request.txt --concurrency 16 -- --batch
         """
     )
     
@@ -445,6 +1532,54 @@ Examples:
         help='Path to sqlmap.py (default: sqlmap.py)'
     )
     
+    parser.add_argument(
+        '--concurrency', '--max-inflight',
+        dest='concurrency',
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f'Number of targets scanned concurrently, i.e. sqlmap processes and request '
+             f'files in flight (default: {PROCESSES_PER_CPU} per CPU, at most '
+             f'{HIGH_CONCURRENCY}, here {DEFAULT_CONCURRENCY}); values above '
+             f'{HIGH_CONCURRENCY} tend to exhaust CPU/file descriptors and get throttled'
+    )
+    
+    parser.add_argument(
+        '--single-process',
+        action='store_true',
+        help='Scan all targets with a single sqlmap -m run when the request can be '
+             'expressed as URL + options, so sqlmap starts only once '
+             '(falls back to one -r run per target)'
+    )
+    
+    parser.add_argument(
+        '--dns-precheck',
+        action='store_true',
+        help='Resolve all target hosts before scanning and skip the ones that do not resolve'
+    )
+    
+    parser.add_argument(
+        '--stop-on-fingerprint',
+        action='store_true',
+        help='Stop sqlmap for a target as soon as injection, DB type and DB version '
+             'have all been found, skipping the rest of its tests'
+    )
+    
+    parser.add_argument(
+        '-q', '--quiet',
+        nargs='?',
+        const='sqlmap_bulk_host.log',
+        metavar='LOGFILE',
+        help='Write status and sqlmap output to LOGFILE instead of the console '
+             '(default: sqlmap_bulk_host.log)'
+    )
+    
+    parser.add_argument(
+        '--stdin',
+        action='store_true',
+        help="Pass each request to sqlmap through stdin ('-r -') instead of a temporary "
+             "file (needs a recent sqlmap, use together with --batch)"
+    )
+    
     # Parse known arguments, remaining arguments will be passed to sqlmap
     args, sqlmap_args = parser.parse_known_args()
     
@@ -477,6 +1612,41 @@ def validate_args(args):
     # Check if sqlmap exists
     if not os.path.exists(args.sqlmap):
         raise ValueError(f"sqlmap.py not found: {args.sqlmap}")
+    
+    # Check concurrency
+    if args.concurrency < 1:
+        raise ValueError(f"Concurrency must be at least 1: {args.concurrency}")
+
+
+def setup_logging(log_file=None):
+    """
+    Configure status output.
+    
+    Args:
+        log_file (str): Write status and sqlmap output to this file (buffered)
+            instead of stdout
+    """
+    global raw_output
+    
+    if log_file:
+        raw_output = None
+        # Buffer records and write them in batches; errors are written immediately
+        handler = logging.handlers.MemoryHandler(
+            LOG_BUFFER_RECORDS,
+            flushLevel=logging.ERROR,
+            target=logging.FileHandler(log_file, encoding='utf-8')
+        )
+    else:
+        # On Windows the console expects UTF-8 (PEP 528) while sqlmap writes its
+        # pipe in the ANSI code page, so the output is decoded and goes through
+        # the logger there; elsewhere both sides use the locale encoding
+        raw_output = sys.stdout.buffer if os.name != 'nt' else None
+        handler = logging.StreamHandler(sys.stdout)
+    
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
 
 
 def main():
@@ -488,63 +1658,57 @@ def main():
         # Validate arguments
         validate_args(args)
         
+        setup_logging(args.quiet)
+        
         # Print configuration
-        print("="*60)
-        print("sqlmap Bulk Host Replacement Tool")
-        print("="*60)
-        print(f"Bulk file: {args.bulkfile}")
-        print(f"Request template: {args.request}")
-        print(f"sqlmap path: {args.sqlmap}")
-        print(f"sqlmap arguments: {' '.join(sqlmap_args) if sqlmap_args else '(none)'}")
-        print("="*60)
+        logger.info("="*60)
+        logger.info("sqlmap Bulk Host Replacement Tool")
+        logger.info("="*60)
+        logger.info(f"Bulk file: {args.bulkfile}")
+        logger.info(f"Request template: {args.request}")
+        logger.info(f"sqlmap path: {args.sqlmap}")
+        logger.info(f"Concurrency: {args.concurrency}")
+        if args.concurrency > HIGH_CONCURRENCY:
+            logger.warning(f"[!] Warning: more than {HIGH_CONCURRENCY} concurrent sqlmap processes "
+                           f"usually slows the scan down")
+        logger.info(f"Single sqlmap process: {'yes' if args.single_process else 'no'}")
+        logger.info(f"Request via stdin: {'yes' if args.stdin else 'no'}")
+        logger.info(f"Stop on fingerprint: {'yes' if args.stop_on_fingerprint else 'no'}")
+        logger.info(f"sqlmap arguments: {' '.join(sqlmap_args) if sqlmap_args else '(none)'}")
+        logger.info("="*60)
         
         # Process bulk scan
         stats = process_bulk_scan(
             args.bulkfile,
             args.request,
             args.sqlmap,
-            sqlmap_args
+            sqlmap_args,
+            args.concurrency,
+            args.single_process,
+            args.stdin,
+            args.dns_precheck,
+            args.stop_on_fingerprint
         )
         
         # Print summary
-        print("\n" + "="*60)
-        print("Scan Summary")
-        print("="*60)
-        print(f"Total targets: {stats['total']}")
-        print(f"Successful: {stats['successful']}")
-        print(f"Failed: {stats['failed']}")
-        print("="*60)
+        logger.info("\n" + "="*60)
+        logger.info("Scan Summary")
+        logger.info("="*60)
+        logger.info(f"Total targets: {stats['total']}")
+        logger.info(f"Successful: {stats['successful']}")
+        logger.info(f"Failed: {stats['failed']}")
+        logger.info("="*60)
         
-        # 将成功的资产写入result.txt
-        if 'successful_targets' in stats and stats['successful_targets']:
-            result_file = 'result.txt'
-            try:
-                with open(result_file, 'w', encoding='utf-8') as f:
-                    for target_info in stats['successful_targets']:
-                        # 如果是字典格式（包含数据库信息），格式化输出
-                        if isinstance(target_info, dict):
-                            line = target_info['target']
-                            if target_info.get('db_type'):
-                                line += f" | DB: {target_info['db_type']}"
-                                if target_info.get('db_version'):
-                                    line += f" {target_info['db_version']}"
-                            if target_info.get('injection_detected'):
-                                line += " | SQL Injection: Yes"
-                            f.write(line + '\n')
-                        else:
-                            # 兼容旧格式（字符串）
-                            f.write(str(target_info) + '\n')
-                print(f"\n[+] Successfully saved {len(stats['successful_targets'])} successful targets to {result_file}")
-            except Exception as e:
-                print(f"\n[!] Warning: Could not write to {result_file}: {e}")
+        if stats.get('saved'):
+            logger.info(f"\n[+] Successfully saved {stats['saved']} successful targets to {RESULT_FILE}")
         else:
-            print(f"\n[*] No successful targets to save")
+            logger.info(f"\n[*] No successful targets to save")
         
         # Exit with appropriate code
         sys.exit(0 if stats['failed'] == 0 else 1)
         
     except KeyboardInterrupt:
-        print("\n[!] Interrupted by user")
+        logger.info("\n[!] Interrupted by user")
         sys.exit(130)
     except Exception as e:
         print(f"[-] Error: {e}", file=sys.stderr)
@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Check the combined analysis regexes against the patterns they are built from.
+
+compile_analysis_regexes merges the patterns per literal prefix; these tests
+run every pattern on its own, the way sqlmap output was analyzed before, and
+compare the results on random sqlmap-like transcripts.
+
+Run with:
+    python -m unittest discover -s tests
+"""
+
+import os
+import random
+import re
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sqlmap_bulk_host  # noqa: E402
+
+
+# Number of random transcripts per test
+TRANSCRIPTS = 5000
+
+# Pieces transcripts are built from: text the patterns look for, near misses
+# and plain noise
+FRAGMENTS = (
+    "[INFO] GET parameter 'id' is injectable",
+    "Parameter: id (GET)",
+    "parameter 'id' does not seem to be injectable",
+    "the target URL is vulnerable",
+    "Payload: id=1 AND 1=1 -- SQL",
+    "payload: id=1",
+    "back-end DBMS: MySQL >= 5.0 (injectable)",
+    "back-end DBMS: PostgreSQL",
+    "back-end dbms: microsoft sql server 2019",
+    "back-end DBMS: MSSQL",
+    "back-end DBMS: Oracle",
+    "back-end DBMS:   SQLite",
+    "back-end DBMS: Microsoft Access",
+    "back-end DBMS: unknown",
+    "database management system: MySQL",
+    "database management system: Microsoft SQL Server",
+    "the back-end DBMS is Oracle",
+    "the back-end DBMS is SQLite",
+    "the back-end DBMS is microsoft access",
+    "the back-end DBMS version is 8.0.32",
+    "the back-end DBMS version is 5.5.5",
+    "DBMS version: 15.0",
+    "DBMS version: 9.6",
+    "version: 5.7",
+    "version: 10.4",
+    "web server version: ",
+    "Version:1.2.3",
+    "[WARNING] heuristic test shows that parameter might not be injectable",
+    "starting @ 12:00:00",
+    "",
+    "   ",
+    "\t",
+)
+
+
+def reference_analysis(output):
+    """
+    Analyze output by searching for every pattern separately, in order.
+
+    Args:
+        output (str): sqlmap output text
+
+    Returns:
+        dict: Analysis results, as from analyze_sqlmap_output
+    """
+    output_lower = output.lower()
+    result = {
+        'injection_detected': any(re.search(pattern, output_lower)
+                                  for pattern in sqlmap_bulk_host.INJECTION_PATTERNS),
+        'db_fingerprint': False,
+        'db_type': None,
+        'db_version': None
+    }
+
+    for db_type, patterns in sqlmap_bulk_host.DB_TYPE_PATTERNS.items():
+        if any(re.search(pattern, output_lower) for pattern in patterns):
+            result['db_fingerprint'] = True
+            result['db_type'] = db_type
+            for pattern in sqlmap_bulk_host.VERSION_PATTERNS:
+                match = re.search(pattern, output_lower)
+                if match:
+                    result['db_version'] = match.group(1)
+                    break
+            break
+
+    return result
+
+
+def random_lines(rng):
+    """
+    Build the lines of a random transcript.
+
+    Args:
+        rng (random.Random): Random number generator
+
+    Returns:
+        list: Lines without line endings
+    """
+    lines = []
+    for _ in range(rng.randint(0, 12)):
+        line = ' '.join(rng.choice(FRAGMENTS) for _ in range(rng.randint(1, 3)))
+        if rng.random() < 0.3:
+            line = line.upper()
+        lines.append(line)
+    return lines
+
+
+class AnalysisTest(unittest.TestCase):
+
+    def test_matches_separate_patterns(self):
+        rng = random.Random(0)
+        for _ in range(TRANSCRIPTS):
+            output = rng.choice(('\n', '\r\n')).join(random_lines(rng))
+            self.assertEqual(sqlmap_bulk_host.analyze_sqlmap_output(output),
+                             reference_analysis(output), output)
+
+    def test_chunked_feed(self):
+        # run_sqlmap feeds the output in pieces that end at a line boundary.
+        # Lines end in a non-space character here, so no \s* in a pattern can
+        # reach across a piece boundary
+        rng = random.Random(1)
+        for _ in range(TRANSCRIPTS):
+            lines = [line + ' |' for line in random_lines(rng)]
+            output = ''.join(line + '\n' for line in lines)
+
+            analyzer = sqlmap_bulk_host.OutputAnalyzer()
+            start = 0
+            while start < len(lines):
+                end = start + rng.randint(1, 4)
+                analyzer.feed(''.join(line + '\n' for line in lines[start:end]))
+                start = end
+
+            self.assertEqual(analyzer.result(), reference_analysis(output), output)
+
+    def test_unprefixed_pattern(self):
+        with mock.patch.object(sqlmap_bulk_host, 'INJECTION_PATTERNS',
+                               (*sqlmap_bulk_host.INJECTION_PATTERNS, r'sql injection found')):
+            with self.assertRaisesRegex(ValueError, 'ANALYSIS_PREFIXES'):
+                sqlmap_bulk_host.compile_analysis_regexes()
+
+    def test_version_pattern_groups(self):
+        for pattern in (r'version:\s*[\d.]+', r'version:\s*(?:v)?([\d.]+)',
+                        r'version:\s*([\d.]+)\s*(\w+)'):
+            with mock.patch.object(sqlmap_bulk_host, 'VERSION_PATTERNS', (pattern,)):
+                with self.assertRaisesRegex(ValueError, 'Version pattern'):
+                    sqlmap_bulk_host.compile_analysis_regexes()
+
+
+if __name__ == '__main__':
+    unittest.main()
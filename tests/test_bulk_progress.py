@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Check that BulkProgress splits streamed sqlmap -m output into the same per-URL
+analyses however the output is cut into pieces.
+
+Run with:
+    python -m unittest discover -s tests
+"""
+
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sqlmap_bulk_host  # noqa: E402
+
+
+# Output sqlmap prints for one URL of a -m run
+SECTIONS = (
+    ("http://1.1.1.1:80/?id=1",
+     "[INFO] testing connection to the target URL\n"
+     "[INFO] GET parameter 'id' is injectable\n"
+     "back-end DBMS: MySQL >= 5.0\n"),
+    ("http://2.2.2.2:8080/?id=1",
+     "[WARNING] GET parameter 'id' does not seem to be injectable\n"),
+    ("https://8.8.8.8:443/?id=1",
+     "[INFO] the back-end DBMS is PostgreSQL\n"
+     "the back-end DBMS version is 15.2\n"),
+)
+
+
+def bulk_output(newline):
+    """
+    Build the output of a sqlmap -m run over SECTIONS.
+
+    Args:
+        newline (str): Line ending sqlmap uses
+
+    Returns:
+        str: Output with a "[i/N] URL:" marker before every section
+    """
+    output = "[INFO] parsing multiple targets list\n"
+    for number, (url, text) in enumerate(SECTIONS, 1):
+        output += f"[{number}/{len(SECTIONS)}] URL:\nGET {url}\n{text}"
+    return output.replace('\n', newline)
+
+
+class BulkProgressTest(unittest.TestCase):
+
+    def collect(self, pieces):
+        done = []
+        progress = sqlmap_bulk_host.BulkProgress(
+            lambda url, analyzer: done.append((url, analyzer.result())))
+        for piece in pieces:
+            progress.feed(piece)
+        progress.finish()
+        return done
+
+    def test_any_line_aligned_pieces(self):
+        expected = [(url, sqlmap_bulk_host.analyze_sqlmap_output(text)) for url, text in SECTIONS]
+        rng = random.Random(0)
+        for newline in ('\n', '\r\n'):
+            lines = bulk_output(newline).splitlines(keepends=True)
+            for _ in range(500):
+                pieces = []
+                start = 0
+                while start < len(lines):
+                    end = start + rng.randint(1, 3)
+                    pieces.append(''.join(lines[start:end]))
+                    start = end
+                self.assertEqual(self.collect(pieces), expected, pieces)
+
+    def test_marker_split_between_pieces(self):
+        output = bulk_output('\n')
+        cut = output.index("GET http://2.2.2.2")
+        done = self.collect([output[:cut], output[cut:]])
+        self.assertEqual([url for url, _ in done], [url for url, _ in SECTIONS])
+
+    def test_url_recorded_before_run_ends(self):
+        done = []
+        progress = sqlmap_bulk_host.BulkProgress(lambda url, analyzer: done.append(url))
+        progress.feed(bulk_output('\n').split("[3/3]")[0])
+        self.assertEqual(done, [SECTIONS[0][0]])
+        progress.finish()
+        self.assertEqual(done, [SECTIONS[0][0], SECTIONS[1][0]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Check how the request template is split around the host and how request files
+are patched in place for every target.
+
+Run with:
+    python -m unittest discover -s tests
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sqlmap_bulk_host  # noqa: E402
+
+
+# Targets of different lengths, so hosts are both padded and overwritten by shorter ones
+TARGETS = ('1.1.1.1:80', 'very-long-hostname.example.com:8443', 'a:1', '10.0.0.10:8080', 'a:1')
+
+TEMPLATES = {
+    'host header': b'GET /?id=1 HTTP/1.1\nHost: old.example.com\nCookie: a=b\n\n',
+    'no host header': b'GET /?id=1 HTTP/1.1\nCookie: a=b\n\n',
+    'host header at eof': b'GET /?id=1 HTTP/1.1\nCookie: a=b\nHost: old.example.com',
+    'placeholder in header': b'GET /?id=1 HTTP/1.1\nHost: {{Hostname}}\nCookie: a=b\n\n',
+    'two host slots': b'GET /?id=1 HTTP/1.1\nHost: {{Hostname}}\nReferer: http://{{Hostname}}\n\n',
+    'placeholder in request line': b'GET http://{{Hostname}}/?id=1 HTTP/1.1\nHost: {{Hostname}}\n\n',
+    'placeholder in body': b'POST / HTTP/1.1\nHost: {{Hostname}}\n\nid=1&host={{Hostname}}',
+    'body after host': b'POST / HTTP/1.1\nHost: x\n\nid=1',
+}
+
+
+class PrepareTemplateTest(unittest.TestCase):
+
+    def test_host_header_replaced(self):
+        chunks = sqlmap_bulk_host.prepare_template(TEMPLATES['host header'])
+        self.assertEqual(b'h:1'.join(chunks), b'GET /?id=1 HTTP/1.1\nHost: h:1\nCookie: a=b\n\n')
+
+    def test_host_header_added(self):
+        chunks = sqlmap_bulk_host.prepare_template(TEMPLATES['no host header'])
+        self.assertEqual(b'h:1'.join(chunks), b'GET /?id=1 HTTP/1.1\nHost: h:1\nCookie: a=b\n\n')
+
+    def test_host_header_at_eof(self):
+        chunks = sqlmap_bulk_host.prepare_template(TEMPLATES['host header at eof'])
+        self.assertEqual(b'h:1'.join(chunks), b'GET /?id=1 HTTP/1.1\nCookie: a=b\nHost: h:1')
+
+    def test_every_placeholder_replaced(self):
+        chunks = sqlmap_bulk_host.prepare_template(TEMPLATES['two host slots'])
+        self.assertEqual(b'h:1'.join(chunks),
+                         b'GET /?id=1 HTTP/1.1\nHost: h:1\nReferer: http://h:1\n\n')
+
+    def test_non_utf8_bytes_kept(self):
+        template = b'POST / HTTP/1.1\nHost: x\n\nname=\xd6\xd0\xce\xc4'
+        chunks = sqlmap_bulk_host.prepare_template(template)
+        self.assertEqual(b'h:1'.join(chunks), b'POST / HTTP/1.1\nHost: h:1\n\nname=\xd6\xd0\xce\xc4')
+
+
+class HostOffsetsTest(unittest.TestCase):
+
+    def offsets(self, name, width=40):
+        return sqlmap_bulk_host.host_offsets(sqlmap_bulk_host.prepare_template(TEMPLATES[name]), width)
+
+    def test_header_slots(self):
+        self.assertEqual(self.offsets('host header'), [len(b'GET /?id=1 HTTP/1.1\nHost: ')])
+        self.assertEqual(self.offsets('no host header'), [len(b'GET /?id=1 HTTP/1.1\nHost: ')])
+
+    def test_two_slots(self):
+        first = len(b'GET /?id=1 HTTP/1.1\nHost: ')
+        self.assertEqual(self.offsets('two host slots', 40),
+                         [first, first + 40 + len(b'\nReferer: http://')])
+
+    def test_unpaddable(self):
+        for name in ('placeholder in request line', 'placeholder in body', 'host header at eof'):
+            self.assertIsNone(self.offsets(name), name)
+
+    def test_body_after_host_header(self):
+        self.assertEqual(self.offsets('body after host'), [len(b'POST / HTTP/1.1\nHost: ')])
+
+
+class RequestFileTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_file_matches_joined_template(self):
+        width = max(len(target.encode('utf-8')) for target in TARGETS)
+        for name, template in TEMPLATES.items():
+            chunks = sqlmap_bulk_host.prepare_template(template)
+            offsets = sqlmap_bulk_host.host_offsets(chunks, width)
+            request_file = sqlmap_bulk_host.RequestFile(
+                os.path.join(self.temp_dir.name, 'request.txt'), chunks, offsets, width)
+            for target in TARGETS:
+                request_file.write(target)
+                with open(request_file.path, 'rb') as f:
+                    content = f.read()
+                host = target.encode('utf-8')
+                if offsets is not None:
+                    # Padded with spaces at the end of header lines, which sqlmap strips
+                    host = host.ljust(width)
+                self.assertEqual(content, host.join(chunks), (name, target))
+
+    def test_patched_in_place(self):
+        chunks = sqlmap_bulk_host.prepare_template(TEMPLATES['two host slots'])
+        width = 20
+        offsets = sqlmap_bulk_host.host_offsets(chunks, width)
+        request_file = sqlmap_bulk_host.RequestFile(
+            os.path.join(self.temp_dir.name, 'request.txt'), chunks, offsets, width)
+        with mock.patch.object(sqlmap_bulk_host, 'write_temp_file',
+                               wraps=sqlmap_bulk_host.write_temp_file) as write, \
+                mock.patch.object(sqlmap_bulk_host, 'patch_temp_file',
+                                  wraps=sqlmap_bulk_host.patch_temp_file) as patch:
+            request_file.write('first.example:80')
+            request_file.write('b:2')
+        # Written in full once, then only the host is overwritten
+        self.assertEqual(write.call_count, 1)
+        patch.assert_called_once_with(request_file.path, offsets, b'b:2'.ljust(width))
+        with open(request_file.path, 'rb') as f:
+            self.assertEqual(f.read(), b'b:2'.ljust(width).join(chunks))
+
+
+if __name__ == '__main__':
+    unittest.main()